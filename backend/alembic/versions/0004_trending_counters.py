@@ -0,0 +1,51 @@
+"""add book_borrow_counts and trending_books tables
+
+Revision ID: 0004_trending_counters
+Revises: 0003_idempotency_keys
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_trending_counters'
+down_revision = '0003_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'book_borrow_counts',
+        sa.Column('book_id', sa.Integer(), sa.ForeignKey('books.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('borrow_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_book_borrow_counts_day', 'book_borrow_counts', ['day'])
+
+    op.create_table(
+        'trending_books',
+        sa.Column('rank', sa.Integer(), primary_key=True),
+        sa.Column('book_id', sa.Integer(), sa.ForeignKey('books.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('borrow_count', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+    # Seed the rolling window from existing loans so the first refresh is meaningful
+    op.execute(
+        """
+        INSERT INTO book_borrow_counts (book_id, day, borrow_count)
+        SELECT book_id, borrow_date, COUNT(*)
+        FROM borrowings
+        WHERE borrow_date >= CURRENT_DATE - 7
+        GROUP BY book_id, borrow_date
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('trending_books')
+    op.drop_index('ix_book_borrow_counts_day', table_name='book_borrow_counts')
+    op.drop_table('book_borrow_counts')
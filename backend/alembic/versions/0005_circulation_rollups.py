@@ -0,0 +1,45 @@
+"""add daily circulation rollup tables
+
+Revision ID: 0005_circulation_rollups
+Revises: 0004_trending_counters
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_circulation_rollups'
+down_revision = '0004_trending_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'daily_circulation',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('borrows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('returns', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('late_returns', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('fines_collected', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        'daily_category_circulation',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('category', sa.String(length=100), primary_key=True),
+        sa.Column('borrows', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+    # Range scans used to build the rollups
+    op.create_index('ix_borrowings_borrow_date', 'borrowings', ['borrow_date'])
+    op.create_index('ix_borrowings_return_date', 'borrowings', ['return_date'])
+
+
+def downgrade():
+    op.drop_index('ix_borrowings_return_date', table_name='borrowings')
+    op.drop_index('ix_borrowings_borrow_date', table_name='borrowings')
+    op.drop_table('daily_category_circulation')
+    op.drop_table('daily_circulation')
@@ -0,0 +1,50 @@
+"""add holds table
+
+Revision ID: 0006_holds
+Revises: 0005_circulation_rollups
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_holds'
+down_revision = '0005_circulation_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    hold_status = sa.Enum(
+        'waiting',
+        'ready',
+        'fulfilled',
+        'cancelled',
+        'expired',
+        name='holdstatus',
+        native_enum=False,
+        length=20,
+    )
+
+    op.create_table(
+        'holds',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('book_id', sa.Integer(), sa.ForeignKey('books.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('member_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', hold_status, nullable=False, server_default='waiting'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('ready_at', sa.DateTime(timezone=True)),
+        sa.Column('expires_at', sa.DateTime(timezone=True)),
+    )
+    op.create_index('ix_holds_book_status_id', 'holds', ['book_id', 'status', 'id'])
+    op.create_index('ix_holds_status_expires_at', 'holds', ['status', 'expires_at'])
+    op.create_index('ix_holds_member_id', 'holds', ['member_id'])
+
+
+def downgrade():
+    op.drop_index('ix_holds_member_id', table_name='holds')
+    op.drop_index('ix_holds_status_expires_at', table_name='holds')
+    op.drop_index('ix_holds_book_status_id', table_name='holds')
+    op.drop_table('holds')
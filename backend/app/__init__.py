@@ -7,6 +7,7 @@ from sqlalchemy.orm import sessionmaker
 from zope.sqlalchemy import register as zope_register
 
 
+from .invalidation import create_bus
 from .models import Base
 
 # Load environment variables from .env file
@@ -34,7 +35,8 @@ def add_cors_headers(request, response):
         response.headers.update({
             "Access-Control-Allow-Origin": origin,
             "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS, PATCH",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization",
+            "Access-Control-Allow-Headers": "Content-Type, Authorization, Idempotency-Key",
+            "Access-Control-Expose-Headers": "Retry-After, Idempotent-Replayed",
             "Access-Control-Allow-Credentials": "true",
             "Access-Control-Max-Age": "86400",
         })
@@ -71,11 +73,19 @@ def main(global_config, **settings):
     engine = get_engine(settings)
     session_factory = get_session_factory(engine)
     Base.metadata.bind = engine
+    if hasattr(os, "register_at_fork"):
+        # Pooled connections must not be shared with forked workers
+        os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
 
     with Configurator(settings=settings) as config:
+        config.registry.dbengine = engine
+        config.registry.invalidation_bus = create_bus(settings)
+
         # Add CORS tween (must be added before other middlewares)
         config.add_tween("app.cors_tween_factory")
-        
+        # Rate limiting sits under CORS so 429 responses stay readable by browsers
+        config.add_tween("app.ratelimit.ratelimit_tween_factory", under="app.cors_tween_factory")
+
         config.include("pyramid_retry")
         config.include("pyramid_tm")
         config.add_request_method(
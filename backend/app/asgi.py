@@ -0,0 +1,150 @@
+"""ASGI entry point serving the same Pyramid app from an asyncio event loop.
+
+Install the extra and run, for example::
+
+    pip install -e ".[asgi]"
+    LIBRARY_CONFIG=development.ini uvicorn --factory app.asgi:create_app --port 6543
+
+The event loop owns every connection, so slow clients and idle keep-alive
+connections cost no threads. Each complete request is handed to the WSGI app
+on a pool of ``asgi.threads`` threads. Routes, views and JSON contracts are
+exactly those of ``app:main``.
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from pyramid.paster import get_app, setup_logging
+
+DEFAULT_THREADS = 32
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+
+
+def build_environ(scope, body: bytes) -> dict:
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    # The body is fully buffered, which also covers chunked requests
+    environ["CONTENT_LENGTH"] = str(len(body))
+    environ.pop("HTTP_TRANSFER_ENCODING", None)
+    return environ
+
+
+def call_wsgi(wsgi_app, environ):
+    """Run the WSGI app to completion, returning ``(status, headers, body)``."""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers
+        ]
+
+    result = wsgi_app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return started["status"], started["headers"], body
+
+
+class WSGIAdapter:
+    """Minimal ASGI-to-WSGI bridge running the app on a bounded thread pool."""
+
+    def __init__(self, wsgi_app, threads: int = DEFAULT_THREADS, max_body_size: int = DEFAULT_MAX_BODY_SIZE):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.max_body_size = max_body_size
+        self.executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.http(scope, receive, send)
+        else:
+            await send({"type": "websocket.close", "code": 1000})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.executor = ThreadPoolExecutor(self.threads, thread_name_prefix="wsgi")
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.executor is not None:
+                    self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def http(self, scope, receive, send):
+        # Bodies are read on the event loop, so slow uploads never hold a thread
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_size:
+                await self.respond(send, 413, [(b"content-type", b"application/json")],
+                                   b'{"error": "Request body too large"}')
+                return
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+
+        if self.executor is None:
+            # Servers without lifespan support
+            self.executor = ThreadPoolExecutor(self.threads, thread_name_prefix="wsgi")
+        environ = build_environ(scope, b"".join(chunks))
+        loop = asyncio.get_running_loop()
+        status, headers, body = await loop.run_in_executor(self.executor, call_wsgi, self.wsgi_app, environ)
+        await self.respond(send, status, headers, body)
+
+    @staticmethod
+    async def respond(send, status, headers, body):
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_app():
+    """Uvicorn factory; reads the ini file named by ``LIBRARY_CONFIG``."""
+    config_uri = os.getenv("LIBRARY_CONFIG", "development.ini")
+    setup_logging(config_uri)
+    wsgi_app = get_app(config_uri)
+    settings = wsgi_app.registry.settings
+    return WSGIAdapter(
+        wsgi_app,
+        threads=int(settings.get("asgi.threads", DEFAULT_THREADS)),
+        max_body_size=int(settings.get("asgi.max_body_size", DEFAULT_MAX_BODY_SIZE)),
+    )
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from .models.book import Book
+from .models.hold import Hold, HoldStatus
+
+HOLD_LIMIT = 5
+HOLD_PICKUP_DAYS = 3
+EXPIRE_BATCH_SIZE = 100
+
+ACTIVE_STATUSES = (HoldStatus.waiting, HoldStatus.ready)
+
+
+def lock_book(dbsession, book_id: int):
+    """Load ``book_id`` with a row lock so copy handoffs cannot interleave.
+
+    Take this lock before any hold lock on the same book; every handoff locks
+    in that order so concurrent ones cannot deadlock.
+    """
+    return dbsession.get(Book, book_id, with_for_update=True, populate_existing=True)
+
+
+def lock_hold(dbsession, hold_id: int):
+    """Reload ``hold_id`` with a row lock, refreshing any copy already in the session."""
+    return (
+        dbsession.query(Hold)
+        .filter(Hold.id == hold_id)
+        .with_for_update()
+        .populate_existing()
+        .one_or_none()
+    )
+
+
+def assign_next_holds(dbsession, book: Book, now: datetime) -> list:
+    """Reserve free copies of a locked ``book`` for the head of its hold queue.
+
+    Each assigned hold becomes ``ready`` until ``now + HOLD_PICKUP_DAYS`` and
+    takes one copy out of ``copies_available``.
+    """
+    assigned = []
+    while book.copies_available > 0:
+        hold = (
+            dbsession.query(Hold)
+            .filter(Hold.book_id == book.id, Hold.status == HoldStatus.waiting)
+            .order_by(Hold.id.asc())
+            .with_for_update()
+            .first()
+        )
+        if hold is None:
+            break
+        hold.status = HoldStatus.ready
+        hold.ready_at = now
+        hold.expires_at = now + timedelta(days=HOLD_PICKUP_DAYS)
+        book.copies_available -= 1
+        assigned.append(hold)
+    return assigned
+
+
+def release_ready_hold(dbsession, hold: Hold, status: HoldStatus, now: datetime):
+    """Close a ``ready`` hold and pass its reserved copy down the queue.
+
+    Returns the locked book, or ``None`` if the hold stopped being ``ready``
+    before its lock was taken (already borrowed, cancelled or expired).
+    """
+    book = lock_book(dbsession, hold.book_id)
+    hold = lock_hold(dbsession, hold.id)
+    if hold is None or hold.status != HoldStatus.ready:
+        return None
+    hold.status = status
+    book.copies_available += 1
+    assign_next_holds(dbsession, book, now)
+    return book
+
+
+def expire_holds(dbsession, now: datetime, batch_size: int = EXPIRE_BATCH_SIZE) -> list:
+    """Expire up to ``batch_size`` unclaimed ready holds; returns the affected book ids.
+
+    Candidates are read without locks; :func:`release_ready_hold` locks each
+    book and then its hold, and skips holds that were borrowed or cancelled
+    in the meantime. Books are visited in id order so concurrent sweeps take
+    their locks in the same order.
+    """
+    holds = (
+        dbsession.query(Hold)
+        .filter(Hold.status == HoldStatus.ready, Hold.expires_at <= now)
+        .order_by(Hold.expires_at.asc())
+        .limit(batch_size)
+        .all()
+    )
+    book_ids = []
+    for hold in sorted(holds, key=lambda hold: (hold.book_id, hold.id)):
+        book = release_ready_hold(dbsession, hold, HoldStatus.expired, now)
+        if book is not None:
+            book_ids.append(book.id)
+    return book_ids
@@ -0,0 +1,246 @@
+"""Cross-process cache invalidation.
+
+Views call :func:`invalidate` after changing rows that per-process caches
+hold. Once the transaction commits, the configured bus runs the local
+handlers registered with :func:`on_invalidate` and broadcasts the message to
+the other worker processes, which run their own handlers.
+
+Topics in use: ``books`` and ``counts``. A ``None`` key means
+"everything under this topic".
+"""
+import json
+import logging
+import os
+import select
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from pyramid.path import DottedNameResolver
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "app.invalidation.LocalBus"
+
+_handlers = defaultdict(list)
+
+
+def on_invalidate(topic):
+    """Decorator registering ``handler(key)`` for messages on ``topic``."""
+
+    def register(handler):
+        _handlers[topic].append(handler)
+        return handler
+
+    return register
+
+
+def dispatch(topic, key=None):
+    for handler in _handlers.get(topic, ()):
+        try:
+            handler(key)
+        except Exception:
+            log.exception("Invalidation handler failed for %s:%s", topic, key)
+
+
+def dispatch_all():
+    """Drop everything, used when a backend may have missed messages."""
+    for topic in list(_handlers):
+        dispatch(topic, None)
+
+
+def encode(topic, key):
+    return json.dumps([topic, key]).encode("utf-8")
+
+
+def decode(payload):
+    topic, key = json.loads(payload)
+    return topic, key
+
+
+class LocalBus:
+    """Single-process stand-in: handlers run in this process only."""
+
+    def __init__(self, settings=None):
+        pass
+
+    def start(self):
+        pass
+
+    def publish(self, topic, key=None):
+        dispatch(topic, key)
+
+
+class SocketBus(LocalBus):
+    """Broadcast over Unix datagram sockets to workers on the same host.
+
+    Every process binds ``<invalidation.socket_dir>/<pid>.sock`` and publishes
+    by sending to every other socket in the directory. Sockets left behind by
+    dead processes are removed on the first failed send, and messages to a
+    worker whose queue is full are dropped rather than waited on.
+    """
+
+    def __init__(self, settings=None):
+        settings = settings or {}
+        self.directory = settings.get("invalidation.socket_dir") or os.path.join(
+            tempfile.gettempdir(), "library-invalidation"
+        )
+        self._sock = None
+        self._path = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._path = os.path.join(self.directory, f"{os.getpid()}.sock")
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self._path)
+        threading.Thread(target=self._listen, args=(self._sock,), daemon=True).start()
+
+    def _restart_in_child(self):
+        # The parent's socket and listener thread do not belong to this process
+        if self._sock is not None:
+            self._sock.close()
+            self.start()
+
+    def _listen(self, sock):
+        while True:
+            try:
+                payload = sock.recv(65536)
+            except OSError:
+                return  # socket closed
+            try:
+                dispatch(*decode(payload))
+            except ValueError:
+                log.warning("Ignoring malformed invalidation message %r", payload)
+
+    def publish(self, topic, key=None):
+        dispatch(topic, key)
+        if self._sock is None:
+            return
+        payload = encode(topic, key)
+        own_name = os.path.basename(self._path)
+        for name in os.listdir(self.directory):
+            if name == own_name or not name.endswith(".sock"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                # Never wait on a stalled worker; this runs in after-commit hooks
+                self._sock.sendto(payload, socket.MSG_DONTWAIT, path)
+            except BlockingIOError:
+                # Its queue is full; the worker's caches expire on their own TTL
+                log.warning("Dropped invalidation %s:%s for busy worker %s", topic, key, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            except OSError:
+                log.exception("Failed to send invalidation to %s", path)
+
+
+class PostgresNotifyBus(LocalBus):
+    """Broadcast with PostgreSQL LISTEN/NOTIFY, across hosts sharing the database."""
+
+    CHANNEL = "library_invalidation"
+    RECONNECT_DELAY_SECONDS = 5
+
+    def __init__(self, settings=None):
+        from sqlalchemy.engine import make_url
+
+        url = make_url(settings["sqlalchemy.url"]).set(drivername="postgresql")
+        self.dsn = url.render_as_string(hide_password=False)
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        # Identifies our own notifications, which LISTEN also delivers back to us
+        self._sender = uuid.uuid4().hex
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    def start(self):
+        threading.Thread(target=self._listen, daemon=True).start()
+
+    def _restart_in_child(self):
+        # Connections are not fork-safe; drop inherited ones without closing them
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._sender = uuid.uuid4().hex
+        self.start()
+
+    def _listen(self):
+        while True:
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.CHANNEL}")
+                # Messages may have been missed while disconnected
+                dispatch_all()
+                while True:
+                    if select.select([conn], [], [], self.RECONNECT_DELAY_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._receive(conn.notifies.pop(0).payload)
+            except Exception:
+                log.exception("Invalidation listener disconnected, reconnecting")
+                time.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    def _receive(self, payload):
+        try:
+            topic, key, sender = json.loads(payload)
+        except ValueError:
+            log.warning("Ignoring malformed invalidation message %r", payload)
+            return
+        if sender != self._sender:
+            dispatch(topic, key)
+
+    def publish(self, topic, key=None):
+        dispatch(topic, key)
+        payload = json.dumps([topic, key, self._sender])
+        with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = self._connect()
+                with self._publish_conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self.CHANNEL, payload))
+            except Exception:
+                self._publish_conn = None
+                log.exception("Failed to publish invalidation %s:%s", topic, key)
+
+
+def create_bus(settings):
+    factory = DottedNameResolver().maybe_resolve(settings.get("invalidation.backend", DEFAULT_BACKEND))
+    bus = factory(settings)
+    bus.start()
+    return bus
+
+
+def _publish_after_commit(succeeded, bus, messages):
+    if not succeeded:
+        return
+    for topic, key in messages:
+        bus.publish(topic, key)
+
+
+def invalidate(request, topic, key=None):
+    """Publish ``topic``/``key`` once the request's transaction commits."""
+    messages = getattr(request, "_invalidations", None)
+    if messages is None:
+        messages = request._invalidations = set()
+        request.tm.get().addAfterCommitHook(
+            _publish_after_commit, args=(request.registry.invalidation_bus, messages)
+        )
+    messages.add((topic, key))
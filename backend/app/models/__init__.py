@@ -6,6 +6,10 @@ Base = declarative_base()
 from .user import User, UserRole  # noqa: E402,F401
 from .book import Book  # noqa: E402,F401
 from .borrowing import Borrowing  # noqa: E402,F401
+from .hold import Hold, HoldStatus  # noqa: E402,F401
+from .idempotency import IdempotencyKey  # noqa: E402,F401
+from .trending import BookBorrowCount, TrendingBook  # noqa: E402,F401
+from .analytics import DailyCategoryCirculation, DailyCirculation  # noqa: E402,F401
 
 __all__ = [
 	"Base",
@@ -13,4 +17,11 @@ __all__ = [
 	"UserRole",
 	"Book",
 	"Borrowing",
+	"Hold",
+	"HoldStatus",
+	"IdempotencyKey",
+	"BookBorrowCount",
+	"TrendingBook",
+	"DailyCirculation",
+	"DailyCategoryCirculation",
 ]
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Date, DateTime, Integer, Numeric, String, func
+
+from . import Base
+
+
+class DailyCirculation(Base):
+    """Materialized circulation totals for one closed day."""
+
+    __tablename__ = "daily_circulation"
+
+    day = Column(Date, primary_key=True)
+    borrows = Column(Integer, nullable=False, default=0)
+    returns = Column(Integer, nullable=False, default=0)
+    late_returns = Column(Integer, nullable=False, default=0)
+    fines_collected = Column(Numeric(12, 2), nullable=False, default=0)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class DailyCategoryCirculation(Base):
+    """Materialized borrow count per category for one closed day."""
+
+    __tablename__ = "daily_category_circulation"
+
+    day = Column(Date, primary_key=True)
+    category = Column(String(100), primary_key=True)
+    borrows = Column(Integer, nullable=False, default=0)
+
+
+__all__ = ["DailyCirculation", "DailyCategoryCirculation"]
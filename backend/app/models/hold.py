@@ -0,0 +1,38 @@
+import enum
+
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, func
+from sqlalchemy.orm import relationship
+
+from . import Base
+
+
+class HoldStatus(enum.Enum):
+    waiting = "waiting"
+    ready = "ready"
+    fulfilled = "fulfilled"
+    cancelled = "cancelled"
+    expired = "expired"
+
+
+class Hold(Base):
+    __tablename__ = "holds"
+    __table_args__ = (
+        # Head of a book's queue: first waiting hold by id
+        Index("ix_holds_book_status_id", "book_id", "status", "id"),
+        Index("ix_holds_status_expires_at", "status", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
+    member_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(Enum(HoldStatus, native_enum=False, length=20), nullable=False, default=HoldStatus.waiting)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    ready_at = Column(DateTime(timezone=True))
+    # Set when a copy is reserved; the hold lapses if not borrowed by then
+    expires_at = Column(DateTime(timezone=True))
+
+    book = relationship("Book")
+    member = relationship("User")
+
+
+__all__ = ["Hold", "HoldStatus"]
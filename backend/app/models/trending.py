@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, func
+from sqlalchemy.orm import relationship
+
+from . import Base
+
+
+class BookBorrowCount(Base):
+    """Borrow count for one book on one day, incremented as loans commit."""
+
+    __tablename__ = "book_borrow_counts"
+
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    borrow_count = Column(Integer, nullable=False, default=0)
+
+
+class TrendingBook(Base):
+    """Precomputed top-N snapshot written by the refresh_trending job."""
+
+    __tablename__ = "trending_books"
+
+    rank = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
+    borrow_count = Column(Integer, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    book = relationship("Book")
+
+
+__all__ = ["BookBorrowCount", "TrendingBook"]
@@ -0,0 +1,122 @@
+import math
+import threading
+import time
+
+from pyramid.httpexceptions import HTTPUnauthorized
+from pyramid.path import DottedNameResolver
+from pyramid.response import Response
+from pyramid.settings import asbool
+
+from .views.utils import token_payload
+
+# Requests not listed here cost one token. PBKDF2 makes auth deliberately expensive.
+ROUTE_COSTS = {
+    ("POST", "/api/auth/login"): 10,
+    ("POST", "/api/auth/register"): 10,
+    ("POST", "/api/cloudinary/upload"): 5,
+}
+DEFAULT_COST = 1
+
+LISTING_PATHS = {"/api/books", "/api/borrowings", "/api/history", "/api/holds"}
+
+DEFAULTS = {
+    "ratelimit.enabled": "true",
+    "ratelimit.user_rate": "5",
+    "ratelimit.user_burst": "60",
+    "ratelimit.ip_rate": "10",
+    "ratelimit.ip_burst": "120",
+    "ratelimit.max_limit": "100",
+    "ratelimit.backend": "app.ratelimit.MemoryBackend",
+}
+
+
+class MemoryBackend:
+    """In-process token buckets.
+
+    Each worker process keeps its own buckets, so with N workers a client can
+    get up to N times the configured rate. Point ``ratelimit.backend`` at a
+    shared implementation of ``consume`` for stricter multi-worker limits.
+    """
+
+    MAX_BUCKETS = 100000
+
+    def __init__(self, settings=None):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, cost, rate, burst, now=None):
+        """Take ``cost`` tokens from ``key``'s bucket.
+
+        Returns ``0.0`` when allowed, otherwise the seconds until enough tokens
+        will be available.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            # Re-inserting keeps the dict ordered from least to most recently used
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                # Forgetting the least recently used bucket at worst refills it early
+                del self._buckets[next(iter(self._buckets))]
+            return 0.0 if allowed else (cost - tokens) / rate
+
+
+def too_many_requests(retry_after: float) -> Response:
+    response = Response(status=429, json_body={"error": "Too many requests"})
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def clamp_listing_limit(request, max_limit: int) -> None:
+    if request.method != "GET" or request.path not in LISTING_PATHS:
+        return
+    try:
+        limit = int(request.GET.get("limit", 1))
+    except ValueError:
+        return  # left for the view to reject
+    if limit > max_limit or limit < 1:
+        request.GET["limit"] = str(min(max(limit, 1), max_limit))
+
+
+def ratelimit_tween_factory(handler, registry):
+    """Token-bucket admission control per client IP and per bearer-token user."""
+    settings = dict(DEFAULTS)
+    settings.update({k: v for k, v in registry.settings.items() if k.startswith("ratelimit.")})
+    if not asbool(settings["ratelimit.enabled"]):
+        return handler
+
+    user_rate = float(settings["ratelimit.user_rate"])
+    user_burst = float(settings["ratelimit.user_burst"])
+    ip_rate = float(settings["ratelimit.ip_rate"])
+    ip_burst = float(settings["ratelimit.ip_burst"])
+    max_limit = int(settings["ratelimit.max_limit"])
+
+    backend_factory = DottedNameResolver().maybe_resolve(settings["ratelimit.backend"])
+    backend = backend_factory(settings)
+    registry.ratelimit_backend = backend
+
+    def ratelimit_tween(request):
+        cost = ROUTE_COSTS.get((request.method, request.path), DEFAULT_COST)
+
+        retry_after = backend.consume(f"ip:{request.remote_addr}", cost, ip_rate, ip_burst)
+        if retry_after:
+            return too_many_requests(retry_after)
+
+        if request.headers.get("Authorization"):
+            try:
+                user_id = token_payload(request)["user_id"]
+            except HTTPUnauthorized:
+                user_id = None  # the view reports the auth error
+            if user_id is not None:
+                retry_after = backend.consume(f"user:{user_id}", cost, user_rate, user_burst)
+                if retry_after:
+                    return too_many_requests(retry_after)
+
+        clamp_listing_limit(request, max_limit)
+        return handler(request)
+
+    return ratelimit_tween
@@ -5,12 +5,19 @@ def includeme(config):
     config.add_route("auth.login", "/api/auth/login")
 
     config.add_route("books.list", "/api/books")
+    # Must precede books.detail, which would otherwise match "trending" as an id
+    config.add_route("books.trending", "/api/books/trending")
     config.add_route("books.detail", "/api/books/{id}")
 
     config.add_route("borrow.create", "/api/borrow/{book_id}")
     config.add_route("return.create", "/api/return/{borrowing_id}")
 
+    config.add_route("hold.create", "/api/hold/{book_id}")
+    config.add_route("holds.list", "/api/holds")
+    config.add_route("holds.detail", "/api/holds/{hold_id}")
+
     config.add_route("borrowings.list", "/api/borrowings")
     config.add_route("history.list", "/api/history")
+    config.add_route("analytics.circulation", "/api/analytics/circulation")
     
     config.add_route("cloudinary.upload", "/api/cloudinary/upload")
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Expire ready holds that were not borrowed in time and pass their copies on.
+
+Run periodically, e.g. from cron every 15 minutes::
+
+    expire_holds development.ini
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+
+from pyramid.paster import bootstrap, setup_logging
+
+from ..holds import EXPIRE_BATCH_SIZE, expire_holds
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config_uri", help="Configuration file, e.g., development.ini")
+    parser.add_argument("--batch-size", type=int, default=EXPIRE_BATCH_SIZE)
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    env = bootstrap(args.config_uri)
+
+    expired = 0
+    try:
+        # One transaction per batch keeps row locks short
+        while True:
+            with env["request"].tm:
+                book_ids = expire_holds(env["request"].dbsession, datetime.now(timezone.utc), args.batch_size)
+            for book_id in set(book_ids):
+                env["registry"].invalidation_bus.publish("books", book_id)
+            expired += len(book_ids)
+            # Holds borrowed or cancelled mid-sweep are skipped, so a short batch is not the end
+            if not book_ids:
+                break
+    finally:
+        env["closer"]()
+    print(f"Expired {expired} hold(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Delete expired idempotency keys.
+
+Run periodically, e.g. from cron every hour::
+
+    purge_idempotency_keys development.ini
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+
+from pyramid.paster import bootstrap, setup_logging
+
+from ..views.idempotency import PURGE_BATCH_SIZE, purge_expired
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config_uri", help="Configuration file, e.g., development.ini")
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    env = bootstrap(args.config_uri)
+
+    purged = 0
+    try:
+        # One transaction per batch keeps row locks short
+        while True:
+            with env["request"].tm:
+                deleted = purge_expired(env["request"].dbsession, datetime.now(timezone.utc), args.batch_size)
+            purged += deleted
+            if deleted < args.batch_size:
+                break
+    finally:
+        env["closer"]()
+    print(f"Purged {purged} idempotency key(s)")
+
+
+if __name__ == "__main__":
+    main()
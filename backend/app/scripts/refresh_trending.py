@@ -0,0 +1,42 @@
+"""Compact borrow counters and rebuild the trending snapshot.
+
+Run periodically, e.g. from cron every 10 minutes::
+
+    refresh_trending development.ini
+"""
+import argparse
+import sys
+from datetime import date
+
+from pyramid.paster import bootstrap, setup_logging
+
+from ..trending import DEFAULT_TOP_N, DEFAULT_WINDOW_DAYS, refresh_trending
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config_uri", help="Configuration file, e.g., development.ini")
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    env = bootstrap(args.config_uri)
+    settings = env["registry"].settings
+
+    try:
+        with env["request"].tm:
+            count = refresh_trending(
+                env["request"].dbsession,
+                date.today(),
+                window_days=int(settings.get("trending.window_days", DEFAULT_WINDOW_DAYS)),
+                top_n=int(settings.get("trending.top_n", DEFAULT_TOP_N)),
+            )
+    finally:
+        env["closer"]()
+    print(f"Trending snapshot refreshed with {count} book(s)")
+
+
+if __name__ == "__main__":
+    main()
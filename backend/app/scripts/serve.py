@@ -0,0 +1,132 @@
+"""Pre-fork multi-process server (POSIX only).
+
+The app is loaded once in the master and shared with the workers through
+copy-on-write, then each worker serves the same listening socket with waitress::
+
+    library_serve development.ini --workers 4
+
+Set ``invalidation.backend`` to ``app.invalidation.SocketBus`` (single host)
+or ``app.invalidation.PostgresNotifyBus`` so per-process caches stay coherent.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import plaster
+from pyramid.paster import get_app, setup_logging
+from waitress import create_server
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LISTEN = "0.0.0.0:6543"
+DEFAULT_THREADS = 4
+# Workers dying faster than this are respawned with a delay to avoid a fork loop
+MIN_WORKER_LIFETIME_SECONDS = 1
+
+
+class Shutdown(Exception):
+    pass
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config_uri", help="Configuration file, e.g., development.ini")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="Threads per worker")
+    parser.add_argument("--listen", help="host:port, defaults to [server:main] listen")
+    return parser.parse_args(argv[1:])
+
+
+def bind_socket(listen: str) -> socket.socket:
+    host, _, port = listen.rpartition(":")
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host.strip("[]"), int(port)))
+    sock.listen(1024)
+    return sock
+
+
+def run_worker(app, sock, threads: int) -> None:
+    def stop(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    server = create_server(app, sockets=[sock], threads=threads)
+    server.run()  # returns after SystemExit once in-flight tasks are shut down
+
+
+def spawn(app, sock, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(app, sock, threads)
+        except Exception:
+            log.exception("Worker %s crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+    log.info("Started worker %s", pid)
+    return pid
+
+
+def main(argv=sys.argv):
+    if not hasattr(os, "fork"):
+        sys.exit("library_serve requires a POSIX platform; use pserve instead")
+
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    listen = args.listen or plaster.get_settings(args.config_uri, "server:main").get("listen", DEFAULT_LISTEN)
+
+    app = get_app(args.config_uri)
+    sock = bind_socket(listen.split()[0])
+    # Move everything loaded so far out of the collector's reach so that
+    # collections in the workers do not dirty the shared pages.
+    gc.freeze()
+
+    def shutdown(signum, frame):
+        raise Shutdown()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    workers = {}
+    log.info("Serving on %s with %d worker(s)", listen, args.workers)
+    try:
+        for _ in range(args.workers):
+            workers[spawn(app, sock, args.threads)] = time.monotonic()
+        while True:
+            pid, status = os.wait()
+            started = workers.pop(pid, None)
+            if started is None:
+                continue
+            log.warning("Worker %s exited with status %s, respawning", pid, status)
+            if time.monotonic() - started < MIN_WORKER_LIFETIME_SECONDS:
+                time.sleep(MIN_WORKER_LIFETIME_SECONDS)
+            workers[spawn(app, sock, args.threads)] = time.monotonic()
+    except Shutdown:
+        log.info("Shutting down %d worker(s)", len(workers))
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in workers:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from zope.sqlalchemy import mark_changed
+
+from .models.trending import BookBorrowCount, TrendingBook
+
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_TOP_N = 20
+
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def record_borrow(dbsession, book_id: int, day: date) -> None:
+    """Increment the borrow counter of ``book_id`` for ``day`` in the current transaction."""
+    insert = _UPSERT_DIALECTS.get(dbsession.get_bind().dialect.name)
+    if insert is not None:
+        stmt = insert(BookBorrowCount).values(book_id=book_id, day=day, borrow_count=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BookBorrowCount.book_id, BookBorrowCount.day],
+            set_={"borrow_count": BookBorrowCount.borrow_count + 1},
+        )
+        dbsession.execute(stmt)
+        mark_changed(dbsession)
+        return
+
+    result = dbsession.execute(
+        update(BookBorrowCount)
+        .where(BookBorrowCount.book_id == book_id, BookBorrowCount.day == day)
+        .values(borrow_count=BookBorrowCount.borrow_count + 1)
+    )
+    if result.rowcount == 0:
+        dbsession.add(BookBorrowCount(book_id=book_id, day=day, borrow_count=1))
+    mark_changed(dbsession)
+
+
+def refresh_trending(dbsession, today: date, window_days: int = DEFAULT_WINDOW_DAYS,
+                     top_n: int = DEFAULT_TOP_N) -> int:
+    """Drop counters outside the window and rebuild the top-N snapshot.
+
+    Returns the number of books in the new snapshot.
+    """
+    window_start = today - timedelta(days=window_days - 1)
+    dbsession.query(BookBorrowCount).filter(BookBorrowCount.day < window_start).delete(
+        synchronize_session=False
+    )
+
+    total = func.sum(BookBorrowCount.borrow_count).label("total")
+    rows = (
+        dbsession.query(BookBorrowCount.book_id, total)
+        .group_by(BookBorrowCount.book_id)
+        .order_by(total.desc(), BookBorrowCount.book_id.asc())
+        .limit(top_n)
+        .all()
+    )
+
+    dbsession.query(TrendingBook).delete(synchronize_session=False)
+    computed_at = datetime.now(timezone.utc)
+    dbsession.add_all(
+        TrendingBook(rank=rank, book_id=book_id, borrow_count=int(count), computed_at=computed_at)
+        for rank, (book_id, count) in enumerate(rows, start=1)
+    )
+    mark_changed(dbsession)
+    return len(rows)
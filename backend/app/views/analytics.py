@@ -0,0 +1,178 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from pyramid.httpexceptions import HTTPBadRequest
+from pyramid.view import view_config
+from pyramid_retry import mark_error_retryable
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+
+from ..models.analytics import DailyCategoryCirculation, DailyCirculation
+from ..models.book import Book
+from ..models.borrowing import Borrowing
+from ..models.user import UserRole
+from .utils import current_user, require_role
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 3660
+# Borrows and returns date themselves before they commit, so a day is only
+# stored as a rollup once this long has passed after its midnight
+ROLLUP_GRACE_MINUTES = 15
+
+
+def parse_date(value: str, name: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPBadRequest(json_body={"error": f"{name} must be a date in YYYY-MM-DD format"})
+
+
+def serialize_day(day: date, borrows, returns, late_returns, fines_collected) -> dict:
+    return {
+        "date": day.isoformat(),
+        "borrows": borrows,
+        "returns": returns,
+        "late_returns": late_returns,
+        "fines_collected": float(fines_collected or 0),
+    }
+
+
+def aggregate_circulation(dbsession, start: date, end: date):
+    """Aggregate borrowings between ``start`` and ``end`` inclusive, keyed by day.
+
+    Returns ``(days, categories)`` where ``days`` maps a date to its totals and
+    ``categories`` maps a date to ``{category: borrows}``.
+    """
+    days = defaultdict(lambda: {"borrows": 0, "returns": 0, "late_returns": 0, "fines_collected": Decimal(0)})
+    categories = defaultdict(dict)
+
+    borrow_rows = (
+        dbsession.query(Borrowing.borrow_date, Book.category, func.count(Borrowing.id))
+        .join(Book, Borrowing.book_id == Book.id)
+        .filter(Borrowing.borrow_date >= start, Borrowing.borrow_date <= end)
+        .group_by(Borrowing.borrow_date, Book.category)
+    )
+    for day, category, borrows in borrow_rows:
+        days[day]["borrows"] += borrows
+        categories[day][category] = borrows
+
+    return_rows = (
+        dbsession.query(
+            Borrowing.return_date,
+            func.count(Borrowing.id),
+            func.sum(case((Borrowing.return_date > Borrowing.due_date, 1), else_=0)),
+            func.coalesce(func.sum(Borrowing.fine), 0),
+        )
+        .filter(Borrowing.return_date >= start, Borrowing.return_date <= end)
+        .group_by(Borrowing.return_date)
+    )
+    for day, returns, late_returns, fines in return_rows:
+        days[day].update(
+            returns=returns,
+            late_returns=int(late_returns or 0),
+            fines_collected=Decimal(str(fines)),
+        )
+
+    return days, categories
+
+
+def materialize_closed_days(dbsession, start: date, end: date) -> None:
+    """Store rollups for every day in ``[start, end]`` that has none yet."""
+    existing = {
+        day
+        for (day,) in dbsession.query(DailyCirculation.day).filter(
+            DailyCirculation.day >= start, DailyCirculation.day <= end
+        )
+    }
+    missing = [
+        start + timedelta(days=offset)
+        for offset in range((end - start).days + 1)
+        if start + timedelta(days=offset) not in existing
+    ]
+    if not missing:
+        return
+
+    days, categories = aggregate_circulation(dbsession, missing[0], missing[-1])
+    for day in missing:
+        # Days without activity are stored too so they are never scanned again
+        dbsession.add(DailyCirculation(day=day, **days.get(day, {})))
+        dbsession.add_all(
+            DailyCategoryCirculation(day=day, category=category, borrows=borrows)
+            for category, borrows in categories.get(day, {}).items()
+        )
+    try:
+        dbsession.flush()
+    except IntegrityError as exc:
+        # A concurrent request stored the same days; retry reads its rollups
+        mark_error_retryable(exc)
+        raise
+
+
+@view_config(route_name="analytics.circulation", request_method="GET", renderer="json")
+def circulation_analytics(request):
+    user = current_user(request)
+    require_role(user, [UserRole.librarian.value])
+
+    today = date.today()
+    end = parse_date(request.params["to"], "to") if request.params.get("to") else today
+    end = min(end, today)
+    if request.params.get("from"):
+        start = parse_date(request.params["from"], "from")
+    else:
+        start = end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+
+    if start > end:
+        raise HTTPBadRequest(json_body={"error": "from must not be after to"})
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPBadRequest(json_body={"error": f"Date range cannot exceed {MAX_RANGE_DAYS} days"})
+
+    dbsession = request.dbsession
+    last_closed_day = (datetime.now() - timedelta(minutes=ROLLUP_GRACE_MINUTES)).date() - timedelta(days=1)
+    closed_end = min(end, last_closed_day)
+    if start <= closed_end:
+        materialize_closed_days(dbsession, start, closed_end)
+
+    daily = [
+        serialize_day(row.day, row.borrows, row.returns, row.late_returns, row.fines_collected)
+        for row in dbsession.query(DailyCirculation)
+        .filter(DailyCirculation.day >= start, DailyCirculation.day <= closed_end)
+        .order_by(DailyCirculation.day.asc())
+    ]
+    category_totals = defaultdict(int)
+    category_rows = (
+        dbsession.query(DailyCategoryCirculation.category, func.sum(DailyCategoryCirculation.borrows))
+        .filter(DailyCategoryCirculation.day >= start, DailyCategoryCirculation.day <= closed_end)
+        .group_by(DailyCategoryCirculation.category)
+    )
+    for category, borrows in category_rows:
+        category_totals[category] += int(borrows)
+
+    # Days that may still change (today, and yesterday during the grace period) are computed live
+    live_start = max(start, closed_end + timedelta(days=1))
+    if live_start <= end:
+        days, categories = aggregate_circulation(dbsession, live_start, end)
+        for offset in range((end - live_start).days + 1):
+            day = live_start + timedelta(days=offset)
+            daily.append(serialize_day(day, **days[day]))
+            for category, borrows in categories.get(day, {}).items():
+                category_totals[category] += borrows
+
+    returns = sum(day["returns"] for day in daily)
+    late_returns = sum(day["late_returns"] for day in daily)
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "totals": {
+            "borrows": sum(day["borrows"] for day in daily),
+            "returns": returns,
+            "late_returns": late_returns,
+            "overdue_rate": round(late_returns / returns, 4) if returns else 0.0,
+            "fines_collected": sum(day["fines_collected"] for day in daily),
+        },
+        "daily": daily,
+        "categories": [
+            {"category": category, "borrows": borrows}
+            for category, borrows in sorted(category_totals.items(), key=lambda item: (-item[1], item[0]))
+        ],
+    }
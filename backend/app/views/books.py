@@ -1,11 +1,88 @@
+import itertools
+import json
 import math
+from datetime import datetime, timezone
+
 from pyramid.httpexceptions import HTTPBadRequest, HTTPNotFound
 from pyramid.view import view_config
 
+from ..cache import TTLCache
+from ..holds import assign_next_holds, lock_book
+from ..invalidation import invalidate, on_invalidate
 from ..models.book import Book
 from ..models.user import UserRole
+from .idempotency import idempotent
 from .utils import current_user, json_payload, require_role
 
+DEFAULT_BATCH_MAX = 100
+DEFAULT_BOOK_CACHE_TTL_SECONDS = 30
+DEFAULT_COUNT_CACHE_TTL_SECONDS = 60
+
+# Serialized books keyed by ("id", id) and ("isbn", isbn), shared by get_book and batch lookups
+_book_cache = TTLCache(ttl_seconds=DEFAULT_BOOK_CACHE_TTL_SECONDS, max_entries=10000)
+
+
+@on_invalidate("books")
+def _drop_cached_book(book_id):
+    if book_id is None:
+        _book_cache.clear()
+        return
+    cached = _book_cache.get(("id", book_id))
+    if cached is not None:
+        _book_cache.delete(("isbn", cached["isbn"]))
+    _book_cache.delete(("id", book_id))
+
+
+# Filter totals keyed by (generation, search, category). Bumping the generation
+# on any catalog write makes every older entry unreachable at once.
+_count_cache = TTLCache(ttl_seconds=DEFAULT_COUNT_CACHE_TTL_SECONDS, max_entries=1000)
+_count_generations = itertools.count()
+_count_generation = next(_count_generations)
+
+
+@on_invalidate("counts")
+def _bump_count_generation(_key):
+    global _count_generation
+    _count_generation = next(_count_generations)
+
+
+def estimate_count(dbsession, query) -> int:
+    """Row estimate from the PostgreSQL planner, without scanning the table."""
+    bind = dbsession.get_bind()
+    compiled = query.with_entities(Book.id).statement.compile(dialect=bind.dialect)
+    plan = dbsession.connection().exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_books(request, query, search: str, category: str):
+    """Return ``(total, approximate)`` for a catalog filter, cached per generation.
+
+    On PostgreSQL, filters the planner expects to match at least
+    ``books.approximate_count_threshold`` rows use the estimate instead of COUNT(*).
+    """
+    key = (_count_generation, search, category)
+    cached = _count_cache.get(key)
+    if cached is not None:
+        return cached
+
+    settings = request.registry.settings
+    threshold = int(settings.get("books.approximate_count_threshold", 0))
+    result = None
+    if threshold and request.dbsession.get_bind().dialect.name == "postgresql":
+        estimate = estimate_count(request.dbsession, query)
+        if estimate >= threshold:
+            result = (estimate, True)
+    if result is None:
+        result = (query.count(), False)
+
+    ttl = float(settings.get("books.count_cache_ttl_seconds", DEFAULT_COUNT_CACHE_TTL_SECONDS))
+    _count_cache.set(key, result, ttl_seconds=ttl)
+    return result
+
 
 def serialize_book(book: Book):
     return {
@@ -20,8 +97,57 @@ def serialize_book(book: Book):
     }
 
 
+def cache_books(request, books) -> None:
+    ttl = float(request.registry.settings.get("books.cache_ttl_seconds", DEFAULT_BOOK_CACHE_TTL_SECONDS))
+    for book in books:
+        data = serialize_book(book)
+        _book_cache.set(("id", book.id), data, ttl_seconds=ttl)
+        _book_cache.set(("isbn", book.isbn), data, ttl_seconds=ttl)
+
+
+def batch_lookup(request, field: str, values: list):
+    """Resolve ``values`` of ``field`` ("id" or "isbn") with one IN query for cache misses."""
+    found = {}
+    misses = []
+    for value in dict.fromkeys(values):
+        cached = _book_cache.get((field, value))
+        if cached is not None:
+            found[value] = cached
+        else:
+            misses.append(value)
+
+    if misses:
+        column = Book.id if field == "id" else Book.isbn
+        books = request.dbsession.query(Book).filter(column.in_(misses)).all()
+        cache_books(request, books)
+        for book in books:
+            found[getattr(book, field)] = serialize_book(book)
+
+    return {
+        "items": [found.get(value) for value in values],
+        "missing": [value for value in values if value not in found],
+    }
+
+
 @view_config(route_name="books.list", request_method="GET", renderer="json")
 def list_books(request):
+    ids = (request.params.get("ids") or "").strip()
+    isbns = (request.params.get("isbns") or "").strip()
+    if ids and isbns:
+        raise HTTPBadRequest(json_body={"error": "Use either ids or isbns, not both"})
+    if ids or isbns:
+        values = [value.strip() for value in (ids or isbns).split(",") if value.strip()]
+        batch_max = int(request.registry.settings.get("books.batch_max", DEFAULT_BATCH_MAX))
+        if len(values) > batch_max:
+            raise HTTPBadRequest(json_body={"error": f"At most {batch_max} books per lookup"})
+        if ids:
+            try:
+                values = [int(value) for value in values]
+            except ValueError:
+                raise HTTPBadRequest(json_body={"error": "ids must be comma-separated integers"})
+            return batch_lookup(request, "id", values)
+        return batch_lookup(request, "isbn", values)
+
     search = (request.params.get("search") or "").strip().lower()
     category = (request.params.get("category") or "").strip().lower()
 
@@ -38,7 +164,7 @@ def list_books(request):
     if category:
         query = query.filter(Book.category.ilike(f"%{category}%"))
 
-    total_items = query.count()
+    total_items, approximate = count_books(request, query, search, category)
     total_pages = math.ceil(total_items / limit)
     offset = (page - 1) * limit
 
@@ -48,19 +174,26 @@ def list_books(request):
         "page": page,
         "limit": limit,
         "total_items": total_items,
+        "total_items_approximate": approximate,
         "total_pages": total_pages,
     }
 
 
 @view_config(route_name="books.detail", request_method="GET", renderer="json")
 def get_book(request):
-    book = request.dbsession.get(Book, int(request.matchdict["id"]))
+    book_id = int(request.matchdict["id"])
+    cached = _book_cache.get(("id", book_id))
+    if cached is not None:
+        return cached
+
+    book = request.dbsession.get(Book, book_id)
     if not book:
         raise HTTPNotFound(json_body={"error": "Book not found"})
+    cache_books(request, [book])
     return serialize_book(book)
 
 
-@view_config(route_name="books.list", request_method="POST", renderer="json")
+@view_config(route_name="books.list", request_method="POST", renderer="json", decorator=idempotent)
 def create_book(request):
     user = current_user(request)
     require_role(user, [UserRole.librarian.value])
@@ -86,6 +219,9 @@ def create_book(request):
         cover_url=data.get("cover_url"),
     )
     request.dbsession.add(book)
+    # Assign the id now so the response, which may be stored for replay, includes it
+    request.dbsession.flush()
+    invalidate(request, "counts")
     return {"message": "Book created", "book": serialize_book(book)}
 
 
@@ -94,7 +230,8 @@ def update_book(request):
     user = current_user(request)
     require_role(user, [UserRole.librarian.value])
 
-    book = request.dbsession.get(Book, int(request.matchdict["id"]))
+    # Copy counts are also changed by returns and hold handoffs, which lock the row too
+    book = lock_book(request.dbsession, int(request.matchdict["id"]))
     if not book:
         raise HTTPNotFound(json_body={"error": "Book not found"})
 
@@ -115,6 +252,10 @@ def update_book(request):
             raise HTTPBadRequest(json_body={"error": "copies_available cannot exceed copies_total"})
         book.copies_available = copies_available
 
+    # Newly added copies go to members waiting in the hold queue first
+    assign_next_holds(request.dbsession, book, datetime.now(timezone.utc))
+    invalidate(request, "books", book.id)
+    invalidate(request, "counts")
     return {"message": "Book updated", "book": serialize_book(book)}
 
 
@@ -140,4 +281,6 @@ def delete_book(request):
         )
 
     request.dbsession.delete(book)
+    invalidate(request, "books", book.id)
+    invalidate(request, "counts")
     return {"message": "Book deleted"}
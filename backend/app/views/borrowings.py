@@ -1,12 +1,17 @@
 import math
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
 
 from pyramid.httpexceptions import HTTPBadRequest, HTTPForbidden, HTTPNotFound
 from pyramid.view import view_config
 
+from ..holds import assign_next_holds, lock_book
+from ..invalidation import invalidate
 from ..models.book import Book
 from ..models.borrowing import Borrowing
+from ..models.hold import Hold, HoldStatus
 from ..models.user import UserRole
+from ..trending import record_borrow
+from .idempotency import idempotent
 from .utils import current_user, json_payload, require_role
 
 FINE_PER_DAY = 5000
@@ -30,16 +35,24 @@ def serialize_borrowing(borrow: Borrowing):
     }
 
 
-@view_config(route_name="borrow.create", request_method="POST", renderer="json")
+@view_config(route_name="borrow.create", request_method="POST", renderer="json", decorator=idempotent)
 def borrow_book(request):
     user = current_user(request)
     require_role(user, [UserRole.member.value])
 
     book_id = int(request.matchdict["book_id"])
-    book = request.dbsession.get(Book, book_id)
+    book = lock_book(request.dbsession, book_id)
     if not book:
         raise HTTPNotFound(json_body={"error": "Book not found"})
-    if book.copies_available <= 0:
+
+    # A ready hold already has a copy set aside for this member
+    hold = (
+        request.dbsession.query(Hold)
+        .filter(Hold.book_id == book_id, Hold.member_id == user.id, Hold.status == HoldStatus.ready)
+        .with_for_update()
+        .first()
+    )
+    if hold is None and book.copies_available <= 0:
         raise HTTPBadRequest(json_body={"error": "No copies available"})
 
     active_count = (
@@ -58,13 +71,18 @@ def borrow_book(request):
         due_date=today + timedelta(days=BORROW_DURATION_DAYS),
         fine=0,
     )
-    book.copies_available -= 1
+    if hold is not None:
+        hold.status = HoldStatus.fulfilled
+    else:
+        book.copies_available -= 1
     request.dbsession.add(borrowing)
+    record_borrow(request.dbsession, book.id, today)
+    invalidate(request, "books", book.id)
 
     return {"message": "Borrowed successfully", "borrowing": serialize_borrowing(borrowing)}
 
 
-@view_config(route_name="return.create", request_method="POST", renderer="json")
+@view_config(route_name="return.create", request_method="POST", renderer="json", decorator=idempotent)
 def return_book(request):
     user = current_user(request)
     borrowing_id = int(request.matchdict["borrowing_id"])
@@ -76,6 +94,16 @@ def return_book(request):
     if user.role == UserRole.member and borrowing.member_id != user.id:
         raise HTTPForbidden(json_body={"error": "Cannot return other member's borrow"})
 
+    # Lock the book, then re-read the loan, so a concurrent return of the same
+    # loan is seen here instead of adding its copy a second time
+    book = lock_book(request.dbsession, borrowing.book_id)
+    borrowing = (
+        request.dbsession.query(Borrowing)
+        .filter(Borrowing.id == borrowing_id)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
     if borrowing.return_date:
         raise HTTPBadRequest(json_body={"error": "Already returned"})
 
@@ -88,7 +116,10 @@ def return_book(request):
     else:
         borrowing.fine = 0
 
-    borrowing.book.copies_available += 1
+    # Hand the returned copy straight to the next member in the hold queue
+    book.copies_available += 1
+    assign_next_holds(request.dbsession, book, datetime.now(timezone.utc))
+    invalidate(request, "books", borrowing.book_id)
     return {"message": "Return processed", "borrowing": serialize_borrowing(borrowing)}
 
 
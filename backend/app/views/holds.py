@@ -0,0 +1,133 @@
+import math
+from datetime import datetime, timezone
+
+from pyramid.httpexceptions import HTTPBadRequest, HTTPConflict, HTTPForbidden, HTTPNotFound
+from pyramid.view import view_config
+from sqlalchemy import func
+
+from ..holds import ACTIVE_STATUSES, HOLD_LIMIT, lock_book, lock_hold, release_ready_hold
+from ..invalidation import invalidate
+from ..models.book import Book
+from ..models.hold import Hold, HoldStatus
+from ..models.user import UserRole
+from .idempotency import idempotent
+from .utils import current_user, require_role
+
+
+def queue_position(dbsession, hold: Hold):
+    if hold.status != HoldStatus.waiting:
+        return None
+    ahead = (
+        dbsession.query(func.count(Hold.id))
+        .filter(Hold.book_id == hold.book_id, Hold.status == HoldStatus.waiting, Hold.id < hold.id)
+        .scalar()
+    )
+    return ahead + 1
+
+
+def serialize_hold(hold: Hold, position=None):
+    return {
+        "id": hold.id,
+        "book": {
+            "id": hold.book.id,
+            "title": hold.book.title,
+            "author": hold.book.author,
+        },
+        "member_id": hold.member_id,
+        "status": hold.status.value,
+        "position": position,
+        "created_at": hold.created_at.isoformat() if hold.created_at else None,
+        "ready_at": hold.ready_at.isoformat() if hold.ready_at else None,
+        "expires_at": hold.expires_at.isoformat() if hold.expires_at else None,
+    }
+
+
+@view_config(route_name="hold.create", request_method="POST", renderer="json", decorator=idempotent)
+def place_hold(request):
+    user = current_user(request)
+    require_role(user, [UserRole.member.value])
+
+    book_id = int(request.matchdict["book_id"])
+    # Serialized with returns, so a copy freed right now is either seen here or handed to this hold
+    book = lock_book(request.dbsession, book_id)
+    if not book:
+        raise HTTPNotFound(json_body={"error": "Book not found"})
+    if book.copies_available > 0:
+        raise HTTPBadRequest(json_body={"error": "Copies are available, borrow the book instead"})
+
+    active = (
+        request.dbsession.query(Hold)
+        .filter(Hold.member_id == user.id, Hold.status.in_(ACTIVE_STATUSES))
+        .all()
+    )
+    if any(hold.book_id == book_id for hold in active):
+        raise HTTPConflict(json_body={"error": "You already have a hold on this book"})
+    if len(active) >= HOLD_LIMIT:
+        raise HTTPBadRequest(json_body={"error": f"Hold limit reached ({HOLD_LIMIT} active)"})
+
+    hold = Hold(book=book, member=user, status=HoldStatus.waiting)
+    request.dbsession.add(hold)
+    request.dbsession.flush()
+    return {"message": "Hold placed", "hold": serialize_hold(hold, queue_position(request.dbsession, hold))}
+
+
+@view_config(route_name="holds.list", request_method="GET", renderer="json")
+def list_holds(request):
+    user = current_user(request)
+
+    try:
+        page = int(request.params.get("page", 1))
+        limit = int(request.params.get("limit", 10))
+    except ValueError:
+        raise HTTPBadRequest(json_body={"error": "Invalid page or limit parameter"})
+
+    query = request.dbsession.query(Hold).join(Book)
+    if user.role == UserRole.member:
+        query = query.filter(Hold.member_id == user.id)
+    else:
+        member_id = request.params.get("member_id")
+        if member_id:
+            query = query.filter(Hold.member_id == int(member_id))
+        book_id = request.params.get("book_id")
+        if book_id:
+            query = query.filter(Hold.book_id == int(book_id))
+
+    if request.params.get("active") == "true":
+        query = query.filter(Hold.status.in_(ACTIVE_STATUSES))
+
+    total_items = query.count()
+    total_pages = math.ceil(total_items / limit)
+    offset = (page - 1) * limit
+
+    holds = query.order_by(Hold.id.desc()).limit(limit).offset(offset).all()
+    return {
+        "items": [serialize_hold(h, queue_position(request.dbsession, h)) for h in holds],
+        "page": page,
+        "limit": limit,
+        "total_items": total_items,
+        "total_pages": total_pages,
+    }
+
+
+@view_config(route_name="holds.detail", request_method="DELETE", renderer="json")
+def cancel_hold(request):
+    user = current_user(request)
+
+    hold = request.dbsession.get(Hold, int(request.matchdict["hold_id"]))
+    if not hold:
+        raise HTTPNotFound(json_body={"error": "Hold not found"})
+    if user.role == UserRole.member and hold.member_id != user.id:
+        raise HTTPForbidden(json_body={"error": "Cannot cancel other member's hold"})
+
+    # Lock the book before the hold, as every handoff does, then re-check its status
+    lock_book(request.dbsession, hold.book_id)
+    hold = lock_hold(request.dbsession, hold.id)
+    if hold.status not in ACTIVE_STATUSES:
+        raise HTTPBadRequest(json_body={"error": f"Hold is already {hold.status.value}"})
+
+    if hold.status == HoldStatus.ready:
+        release_ready_hold(request.dbsession, hold, HoldStatus.cancelled, datetime.now(timezone.utc))
+        invalidate(request, "books", hold.book_id)
+    else:
+        hold.status = HoldStatus.cancelled
+    return {"message": "Hold cancelled", "hold": serialize_hold(hold)}
@@ -0,0 +1,146 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from pyramid.httpexceptions import HTTPBadRequest, HTTPConflict, HTTPUnprocessableEntity
+from pyramid.response import Response
+from pyramid_retry import mark_error_retryable
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from ..models.idempotency import IdempotencyKey
+from .utils import current_user
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+DEFAULT_TTL_SECONDS = 86400
+PURGE_BATCH_SIZE = 100
+
+
+def request_fingerprint(request) -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(request.path.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(request.body or b"")
+    return digest.hexdigest()
+
+
+def _stored_response(request, user_id, key, request_hash, now):
+    record = (
+        request.dbsession.query(IdempotencyKey)
+        .filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > now,
+        )
+        .first()
+    )
+    if record is None:
+        return None
+    if record.request_hash != request_hash:
+        raise HTTPUnprocessableEntity(
+            json_body={"error": "Idempotency-Key was already used with a different request"}
+        )
+    if record.status_code is None:
+        # A claim commits together with its response, so this only guards
+        # against rows written some other way.
+        raise HTTPConflict(
+            json_body={"error": "A request with this Idempotency-Key is still in progress"}
+        )
+
+    response = Response(
+        text=record.response_body,
+        status=record.status_code,
+        content_type="application/json",
+        charset="utf-8",
+    )
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def purge_expired(dbsession, now, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete up to ``batch_size`` expired keys and return how many were removed."""
+    expired_ids = (
+        select(IdempotencyKey.id).where(IdempotencyKey.expires_at <= now).limit(batch_size)
+    )
+    return (
+        dbsession.query(IdempotencyKey)
+        .filter(IdempotencyKey.id.in_(expired_ids))
+        .delete(synchronize_session=False)
+    )
+
+
+def _claim_key(request, user_id, key, request_hash, now):
+    """Insert a pending key row before the view runs and return it.
+
+    A duplicate request holding the same key, in this process or another
+    worker, blocks on the unique index until the first transaction ends. If
+    that one committed, the insert fails and the request is retried by
+    pyramid_retry, which then replays the stored response.
+    """
+    dbsession = request.dbsession
+    ttl = int(request.registry.settings.get("idempotency.ttl_seconds", DEFAULT_TTL_SECONDS))
+
+    # Other expired keys are left to the purge_idempotency_keys job
+    dbsession.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.expires_at <= now,
+    ).delete(synchronize_session=False)
+
+    record = IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        expires_at=now + timedelta(seconds=ttl),
+    )
+    dbsession.add(record)
+    try:
+        dbsession.flush()
+    except IntegrityError as exc:
+        mark_error_retryable(exc)
+        raise
+    return record
+
+
+def idempotent(view):
+    """View decorator honouring the ``Idempotency-Key`` request header.
+
+    Successful responses are stored per user and key for ``idempotency.ttl_seconds``
+    and replayed verbatim on retries without running the view again. Error
+    responses are not stored since their transaction is rolled back, which
+    also releases the key.
+    """
+
+    def wrapper(context, request):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return view(context, request)
+
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPBadRequest(
+                json_body={"error": f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters"}
+            )
+
+        # Resolve the user first so a token for a deleted user gets the usual
+        # 401 instead of a foreign key error on the claim
+        user_id = current_user(request).id
+        request_hash = request_fingerprint(request)
+        now = datetime.now(timezone.utc)
+
+        replay = _stored_response(request, user_id, key, request_hash, now)
+        if replay is not None:
+            return replay
+        record = _claim_key(request, user_id, key, request_hash, now)
+
+        response = view(context, request)
+        if 200 <= response.status_code < 300:
+            record.status_code = response.status_code
+            record.response_body = response.body.decode("utf-8")
+        else:
+            request.dbsession.delete(record)
+        return response
+
+    return wrapper
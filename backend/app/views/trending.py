@@ -0,0 +1,37 @@
+from pyramid.view import view_config
+
+from ..cache import TTLCache
+from ..models.trending import TrendingBook
+from ..trending import DEFAULT_WINDOW_DAYS
+from .books import serialize_book
+
+DEFAULT_CACHE_TTL_SECONDS = 60
+
+_trending_cache = TTLCache(ttl_seconds=DEFAULT_CACHE_TTL_SECONDS, max_entries=1)
+
+
+@view_config(route_name="books.trending", request_method="GET", renderer="json")
+def trending_books(request):
+    """Most borrowed books over the rolling window, read from the precomputed snapshot."""
+    cached = _trending_cache.get("trending")
+    if cached is not None:
+        return cached
+
+    settings = request.registry.settings
+    rows = (
+        request.dbsession.query(TrendingBook)
+        .join(TrendingBook.book)
+        .order_by(TrendingBook.rank.asc())
+        .all()
+    )
+    result = {
+        "items": [dict(serialize_book(row.book), borrow_count=row.borrow_count) for row in rows],
+        "window_days": int(settings.get("trending.window_days", DEFAULT_WINDOW_DAYS)),
+        "computed_at": rows[0].computed_at.isoformat() if rows else None,
+    }
+    _trending_cache.set(
+        "trending",
+        result,
+        ttl_seconds=float(settings.get("trending.cache_ttl_seconds", DEFAULT_CACHE_TTL_SECONDS)),
+    )
+    return result
@@ -18,7 +18,7 @@ def create_token(user: User, request: Request, expires_seconds: int = 86400) ->
     return serializer.dumps({"user_id": user.id, "role": user.role.value})
 
 
-def current_user(request: Request) -> User:
+def token_payload(request: Request) -> Dict[str, Any]:
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPUnauthorized(json_body={"error": "Missing Authorization header"})
@@ -32,10 +32,13 @@ def current_user(request: Request) -> User:
     except BadSignature:
         raise HTTPUnauthorized(json_body={"error": "Invalid token"})
 
-    user_id = payload.get("user_id")
-    if user_id is None:
+    if payload.get("user_id") is None:
         raise HTTPUnauthorized(json_body={"error": "Invalid token payload"})
+    return payload
+
 
+def current_user(request: Request) -> User:
+    user_id = token_payload(request)["user_id"]
     user = request.dbsession.get(User, user_id)
     if not user:
         raise HTTPUnauthorized(json_body={"error": "User not found"})
@@ -0,0 +1,109 @@
+"""HTTP throughput at high connection counts, using only the standard library.
+
+Start the server under test with rate limiting disabled
+(``ratelimit.enabled = false``), then for example::
+
+    # WSGI build
+    pserve bench.ini
+    # ASGI build
+    LIBRARY_CONFIG=bench.ini uvicorn --factory app.asgi:create_app --port 6543
+
+    python benchmarks/http_concurrency.py http://127.0.0.1:6543/api/books \\
+        --connections 500 --idle 1000 --duration 15
+
+``--connections`` keep-alive clients send requests back to back.
+``--idle`` extra clients trickle one header byte per second, like slow
+mobile clients, and never complete a request.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def read_response(reader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def active_client(host, port, request, deadline, latencies, errors):
+    writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.monotonic()
+            writer.write(request)
+            status = await read_response(reader)
+            if status == 200:
+                latencies.append(time.monotonic() - started)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+        except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+            errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def idle_client(host, port, request, deadline):
+    try:
+        _, writer = await asyncio.open_connection(host, port)
+        for byte in request[:-2]:  # never send the final CRLF
+            if time.monotonic() >= deadline:
+                break
+            writer.write(bytes([byte]))
+            await writer.drain()
+            await asyncio.sleep(1)
+        writer.close()
+    except OSError:
+        pass
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    path = url.path + (f"?{url.query}" if url.query else "")
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode()
+
+    latencies, errors = [], {}
+    deadline = time.monotonic() + args.duration
+    tasks = [asyncio.create_task(idle_client(host, port, request, deadline)) for _ in range(args.idle)]
+    tasks += [
+        asyncio.create_task(active_client(host, port, request, deadline, latencies, errors))
+        for _ in range(args.connections)
+    ]
+    await asyncio.gather(*tasks)
+
+    latencies.sort()
+    print(f"connections={args.connections} idle={args.idle} duration={args.duration}s")
+    print(f"requests={len(latencies)} throughput={len(latencies) / args.duration:.1f} req/s")
+    if latencies:
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"latency p50={statistics.median(latencies) * 1000:.1f}ms p99={p99 * 1000:.1f}ms")
+    if errors:
+        print(f"errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--idle", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
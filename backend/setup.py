@@ -17,9 +17,18 @@ setup(
         'itsdangerous==2.1.2',
         'waitress==2.1.2',
     ],
+    extras_require={
+        'asgi': ['uvicorn>=0.23'],
+    },
     entry_points={
         'paste.app_factory': [
             'main = app:main',
         ],
+        'console_scripts': [
+            'refresh_trending = app.scripts.refresh_trending:main',
+            'library_serve = app.scripts.serve:main',
+            'expire_holds = app.scripts.expire_holds:main',
+            'purge_idempotency_keys = app.scripts.purge_idempotency_keys:main',
+        ],
     },
 )